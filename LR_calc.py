@@ -7,9 +7,14 @@
 # The algorithm uses the Littlewood-Richardson rule, which states
 # that c_{p1, p2}^{p3} is equal to the number of semistandard
 # tableaux of (skew) shape p3/p2 and weight p1 satisfying the
-# lattice word property.
+# lattice word property. The optional argument processes gives the
+# number of worker processes to split the calculation between (None
+# meaning one per CPU), and split_depth how many letters of the lattice
+# words are chosen before the work is handed out.
 
-def LR_coeff(p1, p2, p3):
+from multiprocessing import Pool
+
+def LR_coeff(p1, p2, p3, processes=1, split_depth=None):
 	# Check that the partitions have compatible sizes.
 	assert sum(p1) + sum(p2) == sum(p3)
 	# Check that the diagram of p1 fits inside the diagram of p3.
@@ -26,86 +31,212 @@ def LR_coeff(p1, p2, p3):
 	if sum(p2) < sum(p1):
 		p1, p2 = p2, p1
 
+	# The length of the lattice word and the number of distinct letters
+	# are fixed for the whole search, so we compute them once here rather
+	# than at every step of the recursion.
+	word_length = sum(p1)
+	num_letters = len(p1)
+
 	# We will construct the lattice words appearing in the 
-	# Littlewood-Richardson rule. For that purpose we store which cell
-	# (i.e. (row, column) coordinate pair) each entry in the lattice
-	# word corresponds to, and vice versa. This allows us to check the
-	# semistandard tableau property easily.
-	entries_to_coords = {}
-	coords_to_entries = {}
+	# Littlewood-Richardson rule. For that purpose we store which entry
+	# in the lattice word each cell (i.e. (row, column) coordinate pair)
+	# corresponds to. coords_to_entries is a grid indexed by row and
+	# then column, holding -1 for cells outside the skew diagram. The rows
+	# and columns are numbered from 1, and the grid has a border of -1 on
+	# every side so that neighbouring cells can be looked up without
+	# checking whether we have fallen off the edge of the diagram. (The
+	# empty partition p3 has no first row, so its grid is just the border.)
+	width = 0
+	if p3:
+		width = p3[0]
+	coords_to_entries = [[-1] * (width + 2) for row in range(len(p3) + 2)]
+
+	# The semistandard tableau property only involves the cell to the
+	# right of each cell and the cell above it. Since the shape is fixed,
+	# we record once and for all the positions in the lattice word of
+	# these two neighbours (or -1 if there is no such cell). The entry
+	# to the right bounds the current entry from above, and the entry
+	# above bounds it from below.
+	upper_neighbour = [-1] * word_length
+	lower_neighbour = [-1] * word_length
 
 	# The variable ctr indicates the position in the lattice word. We
 	# iterate over the rows in the skew diagram of p3/p2, and consider
 	# the cells in reverse order to (i.e. in the order they appear in
 	# the associated lattice word).
 	ctr = 0
-	for row in xrange(len(p3)):
+	for row in range(len(p3)):
 		# offset is the number of cells we skip in the current row
 		# by removing p2 from p3.
 		offset = 0
 		if row < len(p2):
 			offset = p2[row]
-		# We consider the squares from right to left, record their row
-		# and column, as well as their position in the lattice word.
-		for tmp in xrange(p3[row] - offset):
-			entries_to_coords[ctr] = (row+1, p3[row] - tmp)
-			coords_to_entries[(row+1, p3[row] - tmp)] = ctr
+		# We consider the squares from right to left, record their
+		# position in the lattice word, and look up their neighbours;
+		# both neighbours come earlier in the lattice word, so they have
+		# already been recorded.
+		for tmp in range(p3[row] - offset):
+			column = p3[row] - tmp
+			coords_to_entries[row+1][column] = ctr
+			upper_neighbour[ctr] = coords_to_entries[row+1][column+1]
+			lower_neighbour[ctr] = coords_to_entries[row][column]
 			ctr += 1
 
+	# When p1 has a single row or a single column, the search is not
+	# needed (these are the Pieri rules). With a single row, the only
+	# candidate lattice word uses the letter 0 throughout, which gives a
+	# semistandard tableau exactly when no cell of p3/p2 lies below
+	# another. With a single column, the lattice word condition forces the
+	# word to be 0, 1, 2, ..., which gives a semistandard tableau exactly
+	# when no cell of p3/p2 lies to the left of another.
+	if num_letters == 1:
+		if lower_neighbour.count(-1) == word_length:
+			return 1
+		return 0
+	if num_letters == word_length:
+		if upper_neighbour.count(-1) == word_length:
+			return 1
+		return 0
+
+	# Count the lattice words, either directly or, if more than one process
+	# was requested, by splitting the search between worker processes.
+	if processes == 1:
+		return fill_lattice_words(p1, upper_neighbour, lower_neighbour, [], word_length)
+
+	# Branches of the search starting with different letters are
+	# independent, so we first find all valid beginnings of the lattice
+	# word up to length split_depth, and then complete each of them
+	# separately in a pool of processes, adding up the results.
+	# The prefixes can be at most as long as the lattice words themselves.
+	if split_depth is None:
+		split_depth = min(4, word_length // 4)
+	assert split_depth >= 0
+	split_depth = min(split_depth, word_length)
+	prefixes = []
+	fill_lattice_words(p1, upper_neighbour, lower_neighbour, [], split_depth, prefixes)
+	jobs = [(p1, upper_neighbour, lower_neighbour, prefix, word_length) for prefix in prefixes]
+	pool = Pool(processes)
+	try:
+		counts = pool.map(fill_job, jobs)
+	finally:
+		pool.close()
+		pool.join()
+	return sum(counts)
+
+# This function counts the lattice words of weight p1 which give semistandard
+# tableaux of the skew shape described by upper_neighbour and lower_neighbour
+# (see LR_coeff), and which begin with the letters in prefix. Only the first
+# depth letters are filled in, so that depth = len(upper_neighbour) counts
+# complete lattice words. If the list found is given, each lattice word of
+# length depth is also appended to it.
+def fill_lattice_words(p1, upper_neighbour, lower_neighbour, prefix, depth, found=None):
+	word_length = len(upper_neighbour)
+	num_letters = len(p1)
+	start = len(prefix)
+
 	# lattice_word stores the lattice word we've (partially) constructed.
 	# We use 0-indexed entries for convenience.
 	# weight_count tracks the letters we've used for the purpose of
 	# checking the lattice word condition; the i-th entry counts the
-	# number of times the entry i has occurred so far.
-	lattice_word = [None] * sum(p1)
-	weight_count = [0] * len(p1)
-
-	# We recursively consider all possible ways lattice words. We recurse
-	# on the location in the lattice word, keeping track of the number of
-	# solutions we've found so far.
-	def recursive_fill(location, count):
-		# If the location is past the end of the word, we have a solution;
-		# this is the base case of the recursion; increment the number of
-		# solutions and return this.
-		if location >= sum(p1):
-			# If you wanted the lattice words themselves (from which you
-			# could reconstruct the associated tableaux), you could print
-			# the variable tableau at this point.
-			return count + 1
-		# We find all possible values of the next entry in the lattive word.
-		# This is subject to three things: (1) the lattice word condition,
-		# (2) the semistandard tableau condition, (3) having weight p1.
-		viable = []
-		# The possible values are bounded by condition (2) if there are
-		# adjacent cells to the current one. We calculate these bounds.
-		lower_bound = 0
-		upper_bound = len(p1) - 1
-		row, column = entries_to_coords[location]
-		if (row, column + 1) in coords_to_entries:
-			upper_bound = lattice_word[coords_to_entries[(row, column + 1)]]
-		if (row - 1, column) in coords_to_entries:
-			lower_bound = lattice_word[coords_to_entries[(row - 1, column)]] + 1
-		# We now check whether adding a possible value is compatible with
-		# (firstly) condition (1), and (secondly) condition (2).
-		for candidate in xrange(lower_bound, upper_bound + 1):
-			if weight_count[candidate] == p1[candidate]:
-				continue
-			if candidate > 0 and weight_count[candidate] == weight_count[candidate - 1]:
+	# number of times the entry i has occurred so far. weight_count has
+	# one extra entry at the end, larger than any count, which is read as
+	# weight_count[-1] when checking the lattice word condition for the
+	# letter 0; this way the letter 0 needs no special treatment.
+	lattice_word = list(prefix) + [None] * (word_length - start)
+	weight_count = [0] * num_letters + [word_length + 1]
+	for letter in prefix:
+		weight_count[letter] += 1
+
+	# We consider all possible ways of building lattice words, one letter
+	# at a time, backtracking whenever we get stuck. This is a depth-first
+	# search on the location in the lattice word; rather than recursing,
+	# we keep the state of each level of the search in lists indexed by
+	# the location, which avoids the cost of a function call per cell.
+	# next_candidate[location] is the next value to try at that location,
+	# and last_candidate[location] is the largest value allowed there.
+	next_candidate = [0] * depth
+	last_candidate = [0] * depth
+
+	# count is the number of solutions we've found so far. The flag
+	# advancing records whether we have just moved forward to location
+	# (so its bounds need to be calculated) or have just backtracked to
+	# it (so the value previously written there needs to be removed).
+	# The letters of the prefix are fixed, so we never backtrack into it.
+	count = 0
+	location = start
+	advancing = True
+	while location >= start:
+		if advancing:
+			# If the location is past the end of the word, we have a
+			# solution; increment the number of solutions and backtrack.
+			if location >= depth:
+				# The lattice words themselves (from which you could
+				# reconstruct the associated tableaux) are recorded if
+				# requested.
+				if found is not None:
+					found.append(lattice_word[:depth])
+				count += 1
+				location -= 1
+				advancing = False
 				continue
-			# If no condition is voilated, we record the value.
-			viable.append(candidate)
-		# We now recurse over all possible values by writing the value to
-		# lattice_word, and adjusting weight_count accordingly. We proceed
-		# to the next letter in the lattice word, keeping track of the number
-		# of solutions we found along the way.
-		for option in viable:
-			lattice_word[location] = option
-			weight_count[option] += 1
-			count = recursive_fill(location + 1, count)
-			weight_count[option] -= 1
-		# Finally, return the number of solutions
-		return count
-	# Use the recursion to count lattice words, starting at the beginning,
-	# with an initial solution count of zero.
-	return recursive_fill(0,0)
+			# We find all possible values of the next entry in the lattice
+			# word. This is subject to three things: (1) the lattice word
+			# condition, (2) the semistandard tableau condition, (3) having
+			# weight p1. The possible values are bounded by condition (2)
+			# if there are adjacent cells to the current one. We calculate
+			# these bounds.
+			lower_bound = 0
+			upper_bound = num_letters - 1
+			neighbour = upper_neighbour[location]
+			if neighbour != -1:
+				upper_bound = lattice_word[neighbour]
+			neighbour = lower_neighbour[location]
+			if neighbour != -1:
+				lower_bound = lattice_word[neighbour] + 1
+			next_candidate[location] = lower_bound
+			last_candidate[location] = upper_bound
+		else:
+			# We have exhausted the solutions with the current value at
+			# this location, so we remove it from weight_count.
+			weight_count[lattice_word[location]] -= 1
+
+		# We look for the next value within the bounds that is compatible
+		# with condition (3) and condition (1); both are checked at once,
+		# reading the count of each candidate only once.
+		candidate = next_candidate[location]
+		upper_bound = last_candidate[location]
+		while candidate <= upper_bound:
+			used = weight_count[candidate]
+			if used != p1[candidate] and used != weight_count[candidate - 1]:
+				break
+			candidate += 1
+
+		if candidate > upper_bound:
+			# There are no more possible values here, so we backtrack.
+			location -= 1
+			advancing = False
+		else:
+			# If no condition is violated, we write the value to
+			# lattice_word, adjust weight_count accordingly, and proceed to
+			# the next letter in the lattice word.
+			lattice_word[location] = candidate
+			weight_count[candidate] += 1
+			next_candidate[location] = candidate + 1
+			location += 1
+			advancing = True
+	# Finally, return the number of solutions
+	return count
+
+# Worker processes receive their arguments as a single tuple.
+def fill_job(args):
+	return fill_lattice_words(*args)
 
+# A quick check when this file is run directly: c_{[2,1], [2,1]}^{[3,2,1]} is
+# equal to 2, and should be the same when the work is split between processes;
+# the coefficient for three empty partitions is 1.
+if __name__ == "__main__":
+	assert LR_coeff([2,1], [2,1], [3,2,1]) == 2
+	assert LR_coeff([], [], []) == 1
+	assert LR_coeff([2,1], [2,1], [3,2,1], processes=2, split_depth=1) == 2
+	assert LR_coeff([2,1], [2,1], [3,2,1], processes=2, split_depth=4) == 2
+	print(LR_coeff([2,1], [2,1], [3,2,1]))
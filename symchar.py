@@ -9,35 +9,88 @@
 # S_5 is equal to 1. The algorithm is a combination of the 
 # Murnaghan-Nakayama rule and the hook-length formula.
 
-# This helper function takes a partition and a skew-hook, and returns
-# the partition obtained by removing the skew-hook from the partition.
-def rectify(char, skew):
-	newchar = sorted(char)[::-1]
-	sub = {}
-	for i in skew:
-		y = i[1]
-		if y in sub:
-			sub[y] += 1
+# Partitions are manipulated using beta-numbers: a partition with r parts
+# char[0] >= ... >= char[r-1] is encoded as the integer whose set bits are
+# at positions char[i] + r - 1 - i (think of beads on a single runner of an
+# abacus). Each part is then the number of unset bits below its bead, so
+# adding bits below the lowest unset bit (zero parts) gives the same
+# partition. Removing a skew-hook of size k amounts to moving a bead from
+# position p down to an empty position p - k.
+
+# This helper function encodes a partition as beta-numbers.
+def encode(part):
+	beta = 0
+	r = len(part)
+	for i in range(r):
+		beta |= 1 << (part[i] + r - 1 - i)
+	return beta
+
+# This helper function recovers the partition from its beta-numbers.
+def decode(beta):
+	# Discard beads with no gaps below them; they are parts of size zero.
+	while beta & 1:
+		beta >>= 1
+	part = []
+	gaps = 0
+	while beta:
+		if beta & 1:
+			part.append(gaps)
 		else:
-			sub[y] = 1
-	for i in sub:
-		newchar[i] -= sub[i]
-	ctr = len(newchar) - 1
-	while newchar[ctr] == 0 and ctr >= 0:
-		ctr -= 1
-	return newchar[:ctr+1]
+			gaps += 1
+		beta >>= 1
+	return part[::-1]
 
 # For the sake of efficiency, calculated character values are stored in a
 # dictionary so they do not need to be recomputed later ("memoisation").
-# Initially we only have the base case of the trivial group S_0.
-chardict = {}
-chardict[( tuple([]) , tuple([]) )] = 1
+# Initially we only have the base case of the trivial group S_0. The
+# partition is recorded by its beta-numbers, which are cheaper to hash than
+# a tuple of its parts.
+#
+# If the environment variable SYMCHAR_CACHE is set to a file name, the
+# dictionary is also saved to (and loaded from) a shelve database there,
+# so that later runs can reuse the character values calculated earlier.
+# The lookups themselves always go to an ordinary dictionary in memory;
+# the database is only read when the table is created, and the new
+# entries are written to it when the program exits.
+import atexit
+import os
+import shelve
+from ast import literal_eval
+
+class CharTable(dict):
+	def __init__(self, path=None):
+		dict.__init__(self)
+		self.store = None
+		if path is not None:
+			self.store = shelve.open(path, flag='c', protocol=4)
+			# The database keys must be strings, so we store the repr of
+			# each key, which only involves integers and tuples.
+			for key in self.store:
+				self[literal_eval(key)] = self.store[key]
+			atexit.register(self.close)
+
+	# Write any entries not yet in the database, and close it.
+	def close(self):
+		if self.store is None:
+			return
+		for key in self:
+			name = repr(key)
+			if name not in self.store:
+				self.store[name] = self[key]
+		self.store.close()
+		self.store = None
+
+chardict = CharTable(os.environ.get("SYMCHAR_CACHE"))
+chardict[( encode([]) , tuple([]) )] = 1
 
 # This helper function finds the dual (or transpose) partition.
 def dual(part):
+	# The empty partition is its own dual.
+	if not part:
+		return []
 	out = []
 	cursor = len(part)-1
-	for i in xrange(1,part[0]+1):
+	for i in range(1,part[0]+1):
 		while part[cursor] < i:
 			cursor -= 1
 		out.append(cursor+1)
@@ -45,74 +98,112 @@ def dual(part):
 
 # Given a partition, this function returns the dimension of the corresponding
 # irreducible representation of the symmetric group using the hook-length formula.
+# As with character values, dimensions are memoised in a dictionary.
 from math import factorial
+hookdict = {}
 def hook_formula(part):
+	key = tuple(part)
+	if key in hookdict:
+		return hookdict[key]
 	prod = 1
 	loc = dual(part)
-	for i in xrange(len(part)):
-		for j in xrange(part[i]):
+	for i in range(len(part)):
+		for j in range(part[i]):
 			prod *= (part[i] - j+loc[j]-i-1)
-	return factorial(sum(part))/prod
+	# The product of the hook lengths divides n!, so integer division is
+	# exact, and the result stays an integer however large it gets.
+	value = factorial(sum(part)) // prod
+	hookdict[key] = value
+	return value
+
 
+# This helper function finds all skew-hooks of size hook_len that can be
+# removed from the partition with beta-numbers beta. It returns a list of
+# pairs (newbeta, sign), where newbeta encodes (with no zero parts) the
+# partition obtained by removing the skew-hook, and sign is the sign it
+# contributes in the Murnaghan-Nakayama rule. The hook spans one row more
+# than the number of beads strictly between its two ends, which determines
+# the sign.
+def find_hooks(beta, hook_len):
+	hooks = []
+	# The bit q of moves is set if there is a bead at position q + hook_len
+	# and the position q is empty, i.e. if that bead can be moved down.
+	moves = (beta >> hook_len) & ~beta
+	while moves:
+		low = moves & -moves
+		moves ^= low
+		newbeta = beta ^ low ^ (low << hook_len)
+		# If a row was emptied, discard the corresponding bead, so that
+		# each partition has a unique encoding.
+		while newbeta & 1:
+			newbeta >>= 1
+		between = beta & ((low << hook_len) - (low << 1))
+		if bin(between).count("1") % 2 == 1:
+			hooks.append((newbeta, -1))
+		else:
+			hooks.append((newbeta, 1))
+	return hooks
 
 # This function calculuates character values of the symmetric groups for the
 # irreducible representation char at an element of cycle type elt.
+# The character value does not depend on the order of the cycle lengths,
+# so we sort them in decreasing order. Removing the largest hooks first
+# prunes the recursion soonest, and all orders share the same entries in
+# the memoisation table.
 def char_val(char, elt):
+	# Character values are only defined when both partitions have the same
+	# size; otherwise there is nothing to compute.
+	if sum(char) != sum(elt):
+		return 0
+	return beta_char_val(encode(char), tuple(sorted(elt, reverse=True)))
+
+# This function does the work of char_val, with the partition given by its
+# beta-numbers (with no zero parts) and the cycle type given as a tuple in
+# decreasing order, so that the recursion never has to convert between
+# representations.
+def beta_char_val(beta, elt):
+	# The border strip of the partition has as many cells as the position of
+	# its highest bead, which is beta.bit_length() - 1. If the largest hook
+	# is longer than the border strip, there is nothing to remove, and the
+	# character value is zero.
+	if elt and elt[0] >= beta.bit_length():
+		return 0
+
 	# Check whether the calculation has already been done.
-	key = (tuple(char), tuple(elt))
+	key = (beta, elt)
 	if key in chardict:
 		return chardict[key]
 
 	# Check whether we are asked to find the dimension of an irreducible
 	# representation, in which case we use the hook-length formula, and
 	# record the answer before returning.
-	if elt == [1]*len(elt):
-		value = hook_formula(char)
+	# Since the cycle type is in decreasing order, it consists only of
+	# 1-cycles exactly when its first part is 1.
+	if elt[0] == 1:
+		value = hook_formula(decode(beta))
 		chardict[key] = value
 		return value
 
-	# We begin the recursion of the Murnaghan-Nakayama rule. The list
-	# borderstrip contains the coordinates of all border cells in the
-	# diagram of the partition char. These are candidate locations for
-	# rim-hooks. The variable value stores the progressive value of
-	# the character.
-	borderstrip = []
+	# We begin the recursion of the Murnaghan-Nakayama rule. Each skew-hook
+	# of size elt[0] (the largest part of the cycle type) that can be
+	# removed from the partition contributes a smaller character value,
+	# with a sign. The variable value stores the progressive value of the
+	# character.
 	value = 0
-
-	# We zig-zag our way from the bottom-left cell of the diagram (in
-	# English notation) to the top-right, going up a row whenever we
-	# reach the end of a row.
-	x, y = (0, len(char)-1)
-	for i in xrange(len(char) + char[0] - 1): 
-		borderstrip.append((x,y))
-		if char[y] == x + 1:
-			y -= 1
-		else:
-			x += 1
-
-	# Each skew-hook of size elt[0] (the largest part of the cycle type)
-	# must begin somewhere on the border strup, we consider each possible
-	# location and check whether removing elt[0] contiguous blocks results
-	# in a valid partition.
-	for i in xrange(len(borderstrip)-elt[0]+1):
-		start = borderstrip[i]
-		end = borderstrip[i+elt[0]-1]
-		# Check validity of resulting diagram/partition. If invalid, skip.
-		if i > 0:
-			prev = borderstrip[i-1]
-			if prev[0] == start[0]:
-				continue
-		if i + elt[0] - 1 < len(borderstrip) - 1:
-			next = borderstrip[i+elt[0]]
-			if next[1] == end[1]:
-				continue
+	rest = elt[1:]
+	for newbeta, sign in find_hooks(beta, elt[0]):
 		# Recursive step; calculates character value in a smaller instance.
-		augment = char_val(rectify(char, borderstrip[i:i+elt[0]]), elt[1:])
+		augment = beta_char_val(newbeta, rest)
 		# Add to the character value with the correct sign.
-		if (start[1] - end[1]) % 2 == 1:
-			value -= augment
-		else:
-			value += augment
+		value += sign * augment
 	# Add to memoisation table before returning.
 	chardict[key] = value
-	return value
\ No newline at end of file
+	return value
+
+# A quick check when this file is run directly: the example described at the
+# top of the file, and the dimension of the irreducible representation of
+# S_6 for the partition [3,2,1], which is 16.
+if __name__ == "__main__":
+	assert char_val([4,1],[3,1,1]) == 1
+	assert char_val([3,2,1],[1,1,1,1,1,1]) == 16
+	print(char_val([4,1],[3,1,1]))